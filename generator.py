@@ -5,49 +5,96 @@ Format: JSON structuré
 """
 
 import json
-import random
 import math
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, Tuple
 import numpy as np
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# Numba n'est importé (et le noyau compilé) que pour les grandes matrices : en dessous de ce
+# nombre de points, le coût d'import et de compilation dépasse le gain sur le calcul NumPy
+_NUMBA_MIN_POINTS = 500
+_pdist = None
+
+
+def _get_pdist():
+    """Renvoie le noyau Numba des distances (compilé au premier appel), ou False si numba est absent"""
+    global _pdist
+    if _pdist is None:
+        try:
+            from numba import njit, prange
+        except ImportError:
+            _pdist = False
+            return _pdist
+
+        @njit(parallel=True, fastmath=True, cache=True)
+        def _kernel(pts):
+            """Matrice des distances euclidiennes (remplit les deux moitiés symétriques)"""
+            n = pts.shape[0]
+            D = np.empty((n, n))
+            for i in prange(n):
+                xi, yi = pts[i, 0], pts[i, 1]
+                for j in range(i, n):
+                    dx = xi - pts[j, 0]
+                    dy = yi - pts[j, 1]
+                    d = math.sqrt(dx * dx + dy * dy)
+                    D[i, j] = d
+                    D[j, i] = d
+            return D
+
+        _pdist = _kernel
+    return _pdist
+
 class PetroleumVRPGenerator:
     """Générateur d'instances réalistes et GARANTIES FAISABLES pour VRP multi-dépôts multi-produits"""
     
     PRODUCTS = ["essence", "gasoil"]
-    max_capacity = 30000  # Capacité maximale d'un camion en litres
-    less_capacity = 15000 # Capacité minimale d'un camion en litres
+    # Marge sur le nombre de camions selon la difficulté :
+    # easy: 20% (beaucoup de ressources), medium: 10% (le solveur doit bien optimiser),
+    # hard: 0% (nombre minimal de camions, très difficile à résoudre)
+    _TRUCK_MARGIN = {"easy": 1.2, "medium": 1.1, "hard": 1.0}
+    # Capacité des camions en multiple de truck_capacity (bornes basse, haute) selon la difficulté :
+    # jamais en dessous de truck_capacity, qui reste la capacité minimale garantie
+    _CAPACITY_RANGE = {"easy": (1.0, 1.2), "medium": (1.0, 1.1), "hard": (1.0, 1.0)}
     
     def __init__(self, seed: int = 42):
         """Initialise le générateur avec une graine aléatoire"""
-        random.seed(seed)
-        np.random.seed(seed)
-    
-    def _euclidean_distance(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-        """Calcule la distance euclidienne entre deux points"""
-        return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+        self._rng = np.random.default_rng(seed)
     
     def _generate_coordinates(self, n: int, x_range: Tuple[float, float], 
-                            y_range: Tuple[float, float]) -> List[Tuple[float, float]]:
-        """Génère n coordonnées aléatoires dans la zone spécifiée"""
-        coords = []
-        for _ in range(n):
-            x = random.uniform(x_range[0], x_range[1])
-            y = random.uniform(y_range[0], y_range[1])
-            coords.append((round(x, 2), round(y, 2)))
-        return coords
-
-    def _generate_demands(self, n_stations: int, demand_range: Tuple[int, int]) -> List[Dict[str, int]]:
-        """Génère des demandes aléatoires pour chaque station et produit"""
-        all_demands = []
+                            y_range: Tuple[float, float]) -> np.ndarray:
+        """Génère n coordonnées aléatoires (tableau (n, 2)) dans la zone spécifiée"""
+        coords = self._rng.uniform([x_range[0], y_range[0]], [x_range[1], y_range[1]], size=(n, 2))
+        return np.round(coords, 2)
+
+    def _generate_demands(self, n_stations: int, demand_range: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Génère des demandes aléatoires pour chaque station (tableaux essence, gasoil)"""
         min_d, max_d = demand_range
-        for _ in range(n_stations):
-            demand = {
-                "essence": random.randint(min_d, max_d),
-                "gasoil": random.randint(min_d, max_d),
-            }
-            all_demands.append(demand)
-        return all_demands
+        demands = self._rng.integers(min_d, max_d + 1, size=(n_stations, 2))
+        return demands[:, 0], demands[:, 1]
+
+    def _compute_distance_matrix(self, pts: np.ndarray) -> np.ndarray:
+        """Calcule la matrice des distances euclidiennes (arrondies à 2 décimales) entre tous les points"""
+        pts = np.asarray(pts, dtype=np.float64)
+        pdist = _get_pdist() if len(pts) >= _NUMBA_MIN_POINTS else False
+        if pdist:
+            D = pdist(pts)
+        else:
+            # Identité ||p||² + ||q||² - 2 p.q : normes au carré calculées une fois (O(n)),
+            # puis un seul produit matriciel au lieu de n² distances
+            sqn = np.einsum('ij,ij->i', pts, pts)
+            D2 = sqn[:, None] + sqn - 2.0 * pts @ pts.T
+            # Les erreurs d'arrondi peuvent donner de petites valeurs négatives
+            np.maximum(D2, 0.0, out=D2)
+            D = np.sqrt(D2, out=D2)
+        np.round(D, 2, out=D)
+        return D
 
     def _calculate_required_trucks(self, total_demand: int, truck_capacity: int) -> int:
         """Calcule le nombre minimal de camions requis pour une demande totale donnée"""
@@ -61,27 +108,27 @@ class PetroleumVRPGenerator:
                           difficulty: str, **kwargs) -> Dict:
         """Génère une instance complète avec toutes les données et garantit la faisabilité."""
 
-        max_capacity = 30000  # Capacité maximale d'un camion en litres
-        less_capacity = 15000 # Capacité minimale d'un camion en litres
-        
         # 1. Préparation des coordonnées
         max_coord = zone_size
         x_range = (0.0, max_coord)
         y_range = (0.0, max_coord)
         
         # Coordonnées pour tous les lieux
-        all_coords = self._generate_coordinates(n_garages + n_depots + n_stations, x_range, y_range)
-        coords_garages = all_coords[:n_garages]
+        # Un seul tableau (N, 2) découpé par type de lieu (garages, dépôts, stations)
+        all_xy = self._generate_coordinates(n_garages + n_depots + n_stations, x_range, y_range)
+        g_xy, d_xy, s_xy = np.split(all_xy, [n_garages, n_garages + n_depots])
+        coords_garages = g_xy.tolist()
         # 2. Génération des demandes pour les stations
-        station_demands = self._generate_demands(n_stations, demand_range)
+        ess_arr, gas_arr = self._generate_demands(n_stations, demand_range)
         
         # 3. Calcul des demandes totales pour chaque produit
-        total_demand_essence = sum(d["essence"] for d in station_demands)
-        total_demand_gasoil = sum(d["gasoil"] for d in station_demands)
+        total_demand_essence = int(ess_arr.sum())
+        total_demand_gasoil = int(gas_arr.sum())
 
         # 4. GARANTIE DE FAISABILITÉ : Calculer le nombre minimal de camions requis
-        req_trucks_essence = self._calculate_required_trucks(total_demand_essence, max_capacity)
-        req_trucks_gasoil = self._calculate_required_trucks(total_demand_gasoil, max_capacity)
+        # avec truck_capacity, capacité minimale de chaque camion généré
+        req_trucks_essence = self._calculate_required_trucks(total_demand_essence, truck_capacity)
+        req_trucks_gasoil = self._calculate_required_trucks(total_demand_gasoil, truck_capacity)
         
         # Le nombre minimal de camions est la somme des besoins par produit
         # Puisque 1 camion ne transporte qu'UN SEUL type de produit par tournée.
@@ -89,19 +136,7 @@ class PetroleumVRPGenerator:
         
 
         # Ajout d'une petite marge pour que le problème soit optimisable (non trivial)
-        # Easy: 20% de marge
-        # Medium: 10% de marge
-        # Hard: 0% de marge (n_trucks = min_total_required_trucks)
-        
-        if difficulty == 'easy':
-            # Beaucoup de ressources, problème facile
-            truck_margin = 1.2
-        elif difficulty == 'medium':
-            # Ressources limitées, le solveur doit bien optimiser
-            truck_margin = 1.1
-        else: # hard
-            # Nombre minimal de camions : très difficile à résoudre
-            truck_margin = 1.0 
+        truck_margin = self._TRUCK_MARGIN.get(difficulty, 1.0)
         
         n_trucks = math.ceil(min_total_required_trucks * truck_margin)
         
@@ -110,63 +145,47 @@ class PetroleumVRPGenerator:
         n_trucks = max(n_trucks, min_total_required_trucks)
 
         # Generation des camions
-        trucks = []
-        for i in range( n_trucks):
-            coords = coords_garages.pop(random.randint(0, len(coords_garages)-1))
-            trucks.append({
-                "id": f"D{i+1}",
-                "name": f"trucks_{i+1}",
-                "coordinates": {"x": coords[0], "y": coords[1]},
-                # "index": n_garages + i,
-                "capacity": random.randint(less_capacity, max_capacity)
-                })
+        # Tirage groupé du garage d'attache et de la capacité de chaque camion
+        # (plusieurs camions peuvent partager un même garage)
+        homes = self._rng.integers(0, n_garages, size=n_trucks).tolist()
+        lo, hi = self._CAPACITY_RANGE.get(difficulty, (1.0, 1.0))
+        capacities = (truck_capacity * self._rng.uniform(lo, hi, size=n_trucks)).astype(int).tolist()
+        trucks = [{
+            "id": f"T{i+1}",
+            "name": f"trucks_{i+1}",
+            "home_garage": f"G{k+1}",
+            "coordinates": {"x": coords_garages[k][0], "y": coords_garages[k][1]},
+            "capacity": cap
+        } for i, (k, cap) in enumerate(zip(homes, capacities))]
 
         # 5. Construction des listes de lieux
         
-        garages = []
-        for i in range(n_garages):
-            coords = all_coords.pop(0)
-            garages.append({
-                "id": f"G{i+1}",
-                "name": f"Garage_{i+1}",
-                "coordinates": {"x": coords[0], "y": coords[1]},
-                "index": i
-            })
-
-        depots = []
-        for i in range(n_depots):
-            coords = all_coords.pop(0)
-            depots.append({
-                "id": f"D{i+1}",
-                "name": f"Depot_{i+1}",
-                "coordinates": {"x": coords[0], "y": coords[1]},
-                "index": n_garages + i
-            })
-            
-        stations = []
-        for i in range(n_stations):
-            coords = all_coords.pop(0)
-            stations.append({
-                "id": f"S{i+1}",
-                "name": f"Station_{i+1}",
-                "coordinates": {"x": coords[0], "y": coords[1]},
-                "index": n_garages + n_depots + i,
-                "demand": station_demands[i]
-            })
+        garages = [{
+            "id": f"G{i+1}",
+            "name": f"Garage_{i+1}",
+            "coordinates": {"x": x, "y": y},
+            "index": i
+        } for i, (x, y) in enumerate(coords_garages)]
+
+        depots = [{
+            "id": f"D{i+1}",
+            "name": f"Depot_{i+1}",
+            "coordinates": {"x": x, "y": y},
+            "index": n_garages + i
+        } for i, (x, y) in enumerate(d_xy.tolist())]
+
+        stations = [{
+            "id": f"S{i+1}",
+            "name": f"Station_{i+1}",
+            "coordinates": {"x": x, "y": y},
+            "index": n_garages + n_depots + i,
+            "demand": {"essence": e, "gasoil": g}
+        } for i, ((x, y), e, g) in enumerate(zip(s_xy.tolist(), ess_arr.tolist(), gas_arr.tolist()))]
 
         # 6. Construction de la matrice de distances
-        all_sites = garages + depots + stations
-        n_sites = len(all_sites)
-        distance_matrix = np.zeros((n_sites, n_sites))
-        
-        for i in range(n_sites):
-            for j in range(n_sites):
-                p1 = (all_sites[i]['coordinates']['x'], all_sites[i]['coordinates']['y'])
-                p2 = (all_sites[j]['coordinates']['x'], all_sites[j]['coordinates']['y'])
-                distance_matrix[i, j] = round(self._euclidean_distance(p1, p2), 2)
-                
-        # Conversion en liste de listes pour JSON
-        distance_matrix_list = distance_matrix.tolist()
+        # Calculée directement sur le tableau contigu des coordonnées
+        # Conservée en ndarray : la conversion en listes n'a lieu qu'à la sauvegarde si nécessaire
+        distance_matrix = self._compute_distance_matrix(all_xy)
 
         # 7. Création de l'instance finale
         instance = {
@@ -181,14 +200,14 @@ class PetroleumVRPGenerator:
                 "n_depots": n_depots,
                 "n_stations": n_stations,
                 "n_trucks": n_trucks, # Nombre de camions garanti faisable
-                # "truck_capacity": truck_capacity,
+                "truck_capacity": truck_capacity, # Capacité minimale de chaque camion
                 "products": self.PRODUCTS
             },
             "garages": garages,
             "depots": depots,
             "stations": stations,
             "trucks": trucks,
-            "distance_matrix": distance_matrix_list,
+            "distance_matrix": distance_matrix,
             "statistics": {
                 "total_demand_essence": total_demand_essence,
                 "required_trucks_essence": req_trucks_essence,
@@ -201,10 +220,21 @@ class PetroleumVRPGenerator:
         
         return instance
 
+    @staticmethod
+    def _to_json(obj):
+        """Convertit les tableaux NumPy pour le module json standard"""
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        raise TypeError(f"Type {type(obj).__name__} non sérialisable en JSON")
+
     def save_instance(self, instance: Dict, filename: str):
         """Sauvegarde l'instance générée dans un fichier JSON"""
-        with open(f"instances/{filename}", 'w') as f:
-            json.dump(instance, f, indent=2)
+        if HAS_ORJSON:
+            with open(f"instances/{filename}", 'wb') as f:
+                f.write(orjson.dumps(instance, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(f"instances/{filename}", 'w') as f:
+                json.dump(instance, f, indent=2, default=self._to_json)
 
     
 # --- Fin de la classe PetroleumVRPGenerator ---
\ No newline at end of file
@@ -16,9 +16,6 @@ if not os.path.exists("instances"):
 def generate_all_instances():
     """Définit les configurations et génère toutes les instances."""
     
-    # Initialisation du générateur avec une graine pour la reproductibilité
-    generator = PetroleumVRPGenerator(seed=42)
-    
     # Définition des configurations d'instances.
     # Remarque : n_trucks est maintenant ignoré dans le générateur
     # et sera CALCULÉ pour garantir la faisabilité.
@@ -99,6 +96,8 @@ def generate_all_instances():
         print(f"Génération de l'instance {i}/{len(configs)}: {config['difficulty'].upper()} - {config['name']}")
         print(f"{'='*60}")
         
+        # Graine distincte par instance (42 pour la première) pour la reproductibilité
+        generator = PetroleumVRPGenerator(seed=41 + i)
         name = config.pop("name")
         instance = generator.generate_instance(**config)
         generator.save_instance(instance, name)